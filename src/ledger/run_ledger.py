@@ -0,0 +1,215 @@
+import json
+import os
+import boto3
+from botocore.exceptions import ClientError
+from uuid import uuid4
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+#Carregando variáveis de ambiente
+load_dotenv()
+
+#Configurações AWS
+BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
+s3_client = boto3.client('s3')
+
+# Prefixo onde ficam os ledgers de cada execução (um JSON por run_id)
+LEDGER_PREFIX = "ledger/pipeline_runs"
+# Ponteiro para a execução "dona" do pipeline (só é escrito em start_or_resume_run, com escrita condicional)
+LATEST_KEY = f"{LEDGER_PREFIX}/latest.json"
+
+# Política de retomada (configurável via .env)
+# Execuções mais antigas que isso não são retomadas: começamos de novo para não perder histórico da API.
+# Precisa ser bem menor que o intervalo do agendamento, senão a retomada "ocupa" a próxima extração
+MAX_RESUME_AGE_HOURS = int(os.getenv("PIPELINE_MAX_RESUME_AGE_HOURS", "3"))
+# Quantas vezes uma mesma execução pode ser retomada antes de ser abandonada
+MAX_RESUME_ATTEMPTS = int(os.getenv("PIPELINE_MAX_RESUME_ATTEMPTS", "3"))
+# Um ledger em 'running' sem atualização há mais tempo que isso é considerado travado (processo morto)
+STALE_RUNNING_MINUTES = int(os.getenv("PIPELINE_STALE_RUNNING_MINUTES", "60"))
+
+class RunConflictError(RuntimeError):
+    """Outra execução está rodando ou assumiu o ledger (execuções não podem se sobrepor)."""
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def _ledger_key(run_id: str) -> str:
+    return f"{LEDGER_PREFIX}/run_id={run_id}.json"
+
+def _put_json(key: str, payload: dict):
+    # put_object é atômico no S3: o leitor vê o objeto antigo ou o novo, nunca um JSON pela metade
+    s3_client.put_object(
+        Bucket=BUCKET_NAME,
+        Key=key,
+        Body=json.dumps(payload, ensure_ascii=False, indent=2),
+        ContentType='application/json'
+    )
+
+def _get_json(key: str):
+    try:
+        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+def _get_latest():
+    """Retorna (ponteiro, ETag) do latest.json, ou (None, None) se ainda não existir."""
+    try:
+        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=LATEST_KEY)
+    except s3_client.exceptions.NoSuchKey:
+        return None, None
+    return json.loads(response['Body'].read().decode('utf-8')), response['ETag']
+
+def _claim_latest(run_id: str, etag: str):
+    """
+    Aponta o latest.json para 'run_id' com escrita condicional (IfMatch/IfNoneMatch):
+    se outra execução mudou o ponteiro desde a nossa leitura, o S3 rejeita a escrita.
+    """
+    # claim_id muda o conteúdo (e o ETag) mesmo quando o run_id é o mesmo (retomada)
+    pointer = {"run_id": run_id, "claim_id": uuid4().hex, "claimed_at": _now()}
+    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+    try:
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=LATEST_KEY,
+            Body=json.dumps(pointer, ensure_ascii=False, indent=2),
+            ContentType='application/json',
+            **condition
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict"):
+            raise RunConflictError(
+                f"Outra execução assumiu o pipeline ao mesmo tempo que {run_id}. Execuções não podem se sobrepor."
+            ) from e
+        raise
+
+def save_ledger(ledger: dict):
+    """Grava o ledger da execução, desde que ela ainda seja a execução apontada pelo latest.json."""
+    latest, _ = _get_latest()
+    if not latest or latest["run_id"] != ledger["run_id"]:
+        # Outra execução assumiu o pipeline: não sobrescrevemos o que ela registrou
+        raise RunConflictError(
+            f"Execução {ledger['run_id']} não é mais a execução atual "
+            f"(latest: {latest['run_id'] if latest else 'nenhuma'})."
+        )
+    ledger["updated_at"] = _now()
+    _put_json(_ledger_key(ledger["run_id"]), ledger)
+
+def _new_run_id() -> str:
+    # Sufixo aleatório evita que duas execuções no mesmo segundo sobrescrevam o mesmo ledger
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{uuid4().hex[:6]}"
+
+def _check_not_running(ledger: dict):
+    """Recusa iniciar se o ledger mais recente está em 'running' e foi atualizado há pouco."""
+    if ledger.get("status") != "running":
+        return
+
+    last_update = datetime.fromisoformat(ledger["updated_at"])
+    if datetime.now() - last_update < timedelta(minutes=STALE_RUNNING_MINUTES):
+        # Outra execução provavelmente ainda está rodando: não escrevemos no mesmo ledger
+        raise RunConflictError(
+            f"Execução {ledger['run_id']} ainda está em andamento "
+            f"(última atualização: {ledger['updated_at']}). Execuções não podem se sobrepor."
+        )
+    print(f"⚠️ Execução {ledger['run_id']} ficou travada em 'running'; tratando como falha.")
+
+def _can_resume(ledger: dict) -> bool:
+    """Decide se a execução anterior (não concluída) deve ser retomada ou abandonada."""
+    started_at = datetime.fromisoformat(ledger["started_at"])
+    if datetime.now() - started_at > timedelta(hours=MAX_RESUME_AGE_HOURS):
+        print(f"⚠️ Execução {ledger['run_id']} tem mais de {MAX_RESUME_AGE_HOURS}h; não será retomada.")
+        return False
+
+    if ledger.get("resume_count", 0) >= MAX_RESUME_ATTEMPTS:
+        print(f"⚠️ Execução {ledger['run_id']} já foi retomada {MAX_RESUME_ATTEMPTS}x; não será retomada.")
+        return False
+
+    return True
+
+def start_or_resume_run(resume: bool = True) -> dict:
+    """
+    Retoma a última execução se ela não terminou e ainda está dentro da política de retomada;
+    caso contrário inicia um novo run_id. Com resume=False sempre inicia uma execução nova,
+    mas nunca enquanto outra execução estiver em andamento.
+    """
+    latest, latest_etag = _get_latest()
+    ledger = _get_json(_ledger_key(latest["run_id"])) if latest else None
+
+    previous = None
+    if ledger and ledger.get("status") not in ("completed", "abandoned"):
+        # Vale também para resume=False: forçar uma execução nova não pode atropelar uma em andamento
+        _check_not_running(ledger)
+
+        if resume and _can_resume(ledger):
+            _claim_latest(ledger["run_id"], latest_etag)
+            done = [name for name, stage in ledger["stages"].items() if stage.get("status") == "done"]
+            print(f"🔁 Retomando execução {ledger['run_id']} (etapas concluídas: {done or 'nenhuma'})")
+            ledger["status"] = "running"
+            ledger["resume_count"] = ledger.get("resume_count", 0) + 1
+            save_ledger(ledger)
+            return ledger
+
+        previous = ledger
+
+    run_id = _new_run_id()
+    ledger = {
+        "run_id": run_id,
+        "status": "running",
+        "started_at": _now(),
+        "updated_at": _now(),
+        "resume_count": 0,
+        "stages": {}
+    }
+    # O ledger novo é gravado antes do ponteiro, para o latest.json nunca apontar para um ledger inexistente
+    _put_json(_ledger_key(run_id), ledger)
+    try:
+        _claim_latest(run_id, latest_etag)
+    except RunConflictError:
+        ledger["status"] = "abandoned"
+        _put_json(_ledger_key(run_id), ledger)
+        raise
+
+    if previous:
+        # Marca a execução antiga como abandonada para ficar registrado no histórico
+        previous["status"] = "abandoned"
+        _put_json(_ledger_key(previous["run_id"]), previous)
+        print(f"🗑️ Execução {previous['run_id']} abandonada.")
+
+    print(f"🆕 Nova execução iniciada: {run_id}")
+    return ledger
+
+def is_stage_done(ledger: dict, stage: str) -> bool:
+    return ledger["stages"].get(stage, {}).get("status") == "done"
+
+def get_stage_outputs(ledger: dict, stage: str) -> dict:
+    return ledger["stages"].get(stage, {}).get("outputs", {})
+
+def mark_stage_done(ledger: dict, stage: str, outputs: dict = None):
+    """Registra a etapa como concluída junto com os locais de saída (chaves S3, tabelas RDS)."""
+    ledger["stages"][stage] = {
+        "status": "done",
+        "finished_at": _now(),
+        "outputs": outputs or {}
+    }
+    save_ledger(ledger)
+
+def mark_run_failed(ledger: dict, stage: str, error: BaseException):
+    """
+    Registra a falha na etapa. Sub-etapas ("gold.dim_track") também marcam a etapa pai ("gold"),
+    assim o ledger mostra exatamente qual tabela quebrou.
+    """
+    ledger["status"] = "failed"
+    failure = {
+        "status": "failed",
+        "failed_at": _now(),
+        "error": str(error) or type(error).__name__
+    }
+    ledger["stages"][stage] = dict(failure)
+    if "." in stage:
+        ledger["stages"][stage.split(".", 1)[0]] = dict(failure, failed_substage=stage)
+    save_ledger(ledger)
+
+def mark_run_completed(ledger: dict):
+    ledger["status"] = "completed"
+    ledger["finished_at"] = _now()
+    save_ledger(ledger)
@@ -0,0 +1,20 @@
+import pandas as pd
+from sqlalchemy import text
+
+def replace_table_atomic(df: pd.DataFrame, table_name: str, schema: str, engine, cascade: bool = False):
+    """
+    Substitui uma tabela do RDS sem deixá-la pela metade:
+    carrega tudo numa tabela de staging e depois troca numa única transação.
+    Com cascade=True, views/FKs que dependem da tabela também são removidas;
+    sem ele, o DROP falha se houver dependências (e a tabela antiga é mantida).
+    """
+    staging_name = f"{table_name}__staging"
+
+    # 1. Carga completa na staging (se falhar aqui, a tabela oficial continua intacta)
+    df.to_sql(staging_name, con=engine, schema=schema, if_exists='replace', index=False)
+
+    # 2. Swap: DDL no PostgreSQL é transacional, então o DROP + RENAME é tudo ou nada
+    with engine.begin() as conn:
+        drop_mode = " CASCADE" if cascade else ""
+        conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{table_name}{drop_mode};"))
+        conn.execute(text(f"ALTER TABLE {schema}.{staging_name} RENAME TO {table_name};"))
@@ -1,4 +1,5 @@
 import json
+import os
 from pathlib import Path
 
 # Importações dos módulos refatorados para AWS
@@ -7,6 +8,15 @@ from src.load.raw.raw_loader import save_recently_played_raw_to_s3
 from src.load.db.create_tables import create_tables
 from src.transform.silver.silver_recently_played import run_silver
 from src.transform.gold.gold_recently_played import run_gold # Importação da Camada Gold
+from src.ledger.run_ledger import (
+    start_or_resume_run,
+    is_stage_done,
+    get_stage_outputs,
+    mark_stage_done,
+    mark_run_failed,
+    mark_run_completed,
+    RunConflictError,
+)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 TOKEN_PATH = BASE_DIR / "token.json"
@@ -16,35 +26,88 @@ def load_access_token() -> str:
     with open(TOKEN_PATH, encoding="utf-8") as f:
         return json.load(f)["access_token"]
 
-def run_pipeline():
+def run_pipeline(resume: bool = True):
     print("🚀 Iniciando Pipeline Spotify Cloud (End-to-End)...")
 
-    # 1. Infraestrutura (RDS)
-    # Garante que os Schemas (Raw, Silver, Gold) e tabelas iniciais existam no Postgres
-    create_tables()
-    print("🗄️ Estrutura de Schemas e Tabelas garantida no RDS")
-
-    # 2. Extract + Load Raw (S3)
-    # Busca dados novos na API do Spotify e salva o JSON bruto no S3
-    token = load_access_token()
-    data = get_recently_played(token, limit=10)
-    
-    s3_key_raw = save_recently_played_raw_to_s3(data)
-    print(f"📥 Dados brutos (JSON) enviados para S3 Raw: {s3_key_raw}")
-
-    # 3. Transform Silver (S3 + RDS)
-    # Lê todos os JSONs da Raw, limpa, remove duplicatas e salva o CSV consolidado
-    # Também sincroniza a tabela silver.recently_played no banco
-    run_silver()
-    print("🥈 Camada SILVER processada: S3 e RDS atualizados.")
-
-    # 4. Transform Gold (S3 + RDS)
-    # Pega o dado limpo da Silver e separa em Dimensões e Fatos (Star Schema)
-    # Esta é a camada que o Power BI ou o DBeaver usam para análises
-    run_gold()
-    print("🥇 Camada GOLD processada: Dimensões e Fatos criadas.")
+    # 0. Ledger da execução (S3)
+    # Se a última execução falhou, retomamos o mesmo run_id a partir da etapa que quebrou
+    # resume=False (ou PIPELINE_FORCE_NEW_RUN=true no .env) força uma execução nova
+    ledger = start_or_resume_run(resume=resume)
+
+    stage = "infra"
+    try:
+        # 1. Infraestrutura (RDS)
+        # Garante que os Schemas (Raw, Silver, Gold) e tabelas iniciais existam no Postgres
+        # Etapa barata e idempotente: roda sempre, sem checkpoint
+        create_tables()
+        print("🗄️ Estrutura de Schemas e Tabelas garantida no RDS")
+
+        # 2. Extract + Load Raw (S3)
+        # Busca dados novos na API do Spotify e salva o JSON bruto no S3
+        stage = "raw"
+        if is_stage_done(ledger, stage):
+            s3_key_raw = get_stage_outputs(ledger, stage)["s3_key"]
+            print(f"⏭️ RAW já concluída nesta execução: {s3_key_raw}")
+        else:
+            token = load_access_token()
+            data = get_recently_played(token, limit=10)
+
+            s3_key_raw = save_recently_played_raw_to_s3(data)
+            mark_stage_done(ledger, stage, {"s3_key": s3_key_raw})
+            print(f"📥 Dados brutos (JSON) enviados para S3 Raw: {s3_key_raw}")
+
+        # 3. Transform Silver (S3 + RDS)
+        # Lê todos os JSONs da Raw, limpa, remove duplicatas e salva o CSV consolidado
+        # Também sincroniza a tabela silver.recently_played no banco
+        stage = "silver"
+        if is_stage_done(ledger, stage):
+            print("⏭️ SILVER já concluída nesta execução.")
+        else:
+            silver_key = run_silver()
+            mark_stage_done(ledger, stage, {"s3_key": silver_key, "rds_table": "silver.recently_played"})
+            print("🥈 Camada SILVER processada: S3 e RDS atualizados.")
+
+        # 4. Transform Gold (S3 + RDS)
+        # Pega o dado limpo da Silver e separa em Dimensões e Fatos (Star Schema)
+        # Esta é a camada que o Power BI ou o DBeaver usam para análises
+        # Cada tabela tem seu próprio checkpoint ("gold.<tabela>") para retomar no meio da Gold
+        stage = "gold"
+        if is_stage_done(ledger, stage):
+            print("⏭️ GOLD já concluída nesta execução.")
+        else:
+            done_tables = [
+                name.split(".", 1)[1] for name in ledger["stages"]
+                if name.startswith("gold.") and is_stage_done(ledger, name)
+            ]
+
+            def start_gold_table(table_name):
+                # Se a tabela quebrar, a falha fica registrada em "gold.<tabela>"
+                nonlocal stage
+                stage = f"gold.{table_name}"
+
+            def checkpoint_gold_table(table_name, s3_key):
+                mark_stage_done(ledger, f"gold.{table_name}", {"s3_key": s3_key, "rds_table": f"gold.{table_name}"})
+
+            run_gold(skip_tables=done_tables, on_table_start=start_gold_table, on_table_done=checkpoint_gold_table)
+            stage = "gold"
+            mark_stage_done(ledger, stage)
+            print("🥇 Camada GOLD processada: Dimensões e Fatos criadas.")
+
+    except RunConflictError:
+        # Outra execução assumiu o ledger: não registramos nada por cima dela
+        raise
+
+    except BaseException as e:
+        # BaseException inclui Ctrl-C / parada do container (KeyboardInterrupt, SystemExit):
+        # a execução fica como 'failed' e pode ser retomada logo, em vez de travada em 'running'
+        mark_run_failed(ledger, stage, e)
+        print(f"❌ Pipeline falhou na etapa '{stage}' (run_id={ledger['run_id']}): {e}")
+        raise
+
+    mark_run_completed(ledger)
 
     print("\n--- STATUS FINAL DO PIPELINE ---")
+    print(f"🆔 RUN ID : {ledger['run_id']}")
     print("✅ INFRA  : RDS pronto")
     print("✅ RAW    : JSONs no S3")
     print("✅ SILVER : Tabela única limpa")
@@ -52,4 +115,5 @@ def run_pipeline():
     print("--------------------------------")
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    force_new_run = os.getenv("PIPELINE_FORCE_NEW_RUN", "false").lower() in ("1", "true", "yes")
+    run_pipeline(resume=not force_new_run)
\ No newline at end of file
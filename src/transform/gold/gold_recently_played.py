@@ -2,8 +2,9 @@ import os
 import boto3
 import pandas as pd
 from io import StringIO
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from src.load.db.table_swap import replace_table_atomic
 
 #Carregando variáveis de ambiente
 load_dotenv()
@@ -32,7 +33,7 @@ def load_silver_from_s3() -> pd.DataFrame:
     #Lendo csv da memódia (Body) para o pandas
     return pd.read_csv(response['Body'], parse_dates=["played_at"])
 
-def save_gold_incremental(df_new: pd.DataFrame, table_name: str, pk_columns: list):
+def save_gold_incremental(df_new: pd.DataFrame, table_name: str, pk_columns: list) -> str:
     """
     Função Genérica para Carga Incremental na Gold (S3 + RDS) com tratamento de datas.
     """
@@ -75,41 +76,65 @@ def save_gold_incremental(df_new: pd.DataFrame, table_name: str, pk_columns: lis
         print(f"✅ {table_name} atualizada no S3: +{len(df_to_insert)} linhas.")
 
     engine = get_db_engine()
-    
-    # Se você adicionou o DROP CASCADE com text(), mantenha-o aqui:
-    with engine.connect() as conn:
-        from sqlalchemy import text
-        conn.execute(text(f"DROP TABLE IF EXISTS gold.{table_name} CASCADE;"))
-        conn.commit()
 
-    df_final.to_sql(table_name, con=engine, schema='gold', if_exists='replace', index=False)
+    # Carga numa staging + swap transacional (DROP CASCADE + RENAME): se a carga falhar,
+    # a tabela antiga continua no RDS em vez de ficar apagada
+    replace_table_atomic(df_final, table_name, 'gold', engine, cascade=True)
     print(f"🏆 RDS: gold.{table_name} sincronizada ({len(df_final)} total).")
 
-def run_gold():
-    print("🥇 Iniciando processamento GOLD (Cloud)...")
-    
-    # Carrega os dados da Silver (S3)
-    df = load_silver_from_s3()
+    return s3_key
 
+def build_gold_tables(df: pd.DataFrame) -> list:
+    """
+    Monta as tabelas do Star Schema a partir da Silver.
+    Retorna uma lista de (DataFrame, nome_da_tabela, chaves_primarias) na ordem de carga.
+    """
     # --- PROCESSAMENTO DAS DIMENSÕES (Adicionando .copy()) ---
     
     # Artistas - Usamos .copy() no final para evitar o SettingWithCopyWarning
     dim_artist = df[["artist_id", "artist_name"]].drop_duplicates(subset=["artist_id"]).copy()
-    save_gold_incremental(dim_artist, "dim_artist", ["artist_id"])
 
     # Álbuns - Adicionando .copy()
     dim_album = df[["album_id", "album_name", "album_release_date", "artist_id"]].drop_duplicates(subset=["album_id"]).copy()
-    save_gold_incremental(dim_album, "dim_album", ["album_id"])
 
     # Faixas - Adicionando .copy()
     dim_track = df[["track_id", "track_name", "explicit", "popularity"]].drop_duplicates(subset=["track_id"]).copy()
-    save_gold_incremental(dim_track, "dim_track", ["track_id"])
 
     # --- PROCESSAMENTO DA FATO ---
     
     # Fato - Adicionando .copy()
     fact_recently_played = df[["played_at", "track_id", "album_id", "duration_ms"]].copy()
-    save_gold_incremental(fact_recently_played, "fact_recently_played", ["played_at", "track_id"])
 
-    print("🏁 Camada GOLD finalizada com sucesso!")
+    return [
+        (dim_artist, "dim_artist", ["artist_id"]),
+        (dim_album, "dim_album", ["album_id"]),
+        (dim_track, "dim_track", ["track_id"]),
+        (fact_recently_played, "fact_recently_played", ["played_at", "track_id"]),
+    ]
+
+def run_gold(skip_tables: list = None, on_table_start=None, on_table_done=None) -> dict:
+    """
+    Processa a Gold. 'skip_tables' permite pular tabelas já concluídas numa execução anterior,
+    'on_table_start(table_name)' é chamado antes de cada tabela e
+    'on_table_done(table_name, s3_key)' após cada tabela (checkpoint).
+    """
+    print("🥇 Iniciando processamento GOLD (Cloud)...")
+    skip_tables = skip_tables or []
+    
+    # Carrega os dados da Silver (S3)
+    df = load_silver_from_s3()
+
+    gold_keys = {}
+    for df_table, table_name, pk_columns in build_gold_tables(df):
+        if table_name in skip_tables:
+            print(f"⏭️ {table_name}: já concluída nesta execução, pulando.")
+            continue
 
+        if on_table_start:
+            on_table_start(table_name)
+        gold_keys[table_name] = save_gold_incremental(df_table, table_name, pk_columns)
+        if on_table_done:
+            on_table_done(table_name, gold_keys[table_name])
+
+    print("🏁 Camada GOLD finalizada com sucesso!")
+    return gold_keys
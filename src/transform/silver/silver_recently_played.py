@@ -6,6 +6,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 from io import StringIO, BytesIO
 from sqlalchemy import create_engine # Importação necessária para conectar ao banco
+from src.load.db.table_swap import replace_table_atomic
 
 #Carregando variáveis de ambiente
 load_dotenv()
@@ -93,7 +94,7 @@ def transform_items(items: list) -> pd.DataFrame:
     return df
 
 
-def save_silver_to_s3(df_new: pd.DataFrame):
+def save_silver_to_s3(df_new: pd.DataFrame) -> str:
     # Define o caminho (chave) onde o ficheiro consolidado será guardado no S3
     silver_key = "silver/recently_played.csv" 
     
@@ -162,14 +163,8 @@ def save_silver_to_s3(df_new: pd.DataFrame):
         engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{database}')
 
         # Envia o 'df_final' (histórico completo) para a tabela no schema 'silver'
-        # if_exists='replace': Apaga a tabela antiga e cria uma nova com os 80 registos atuais
-        df_final.to_sql(
-            'recently_played', 
-            con=engine, 
-            schema='silver', 
-            if_exists='replace', 
-            index=False
-        )
+        # A carga vai para uma staging e só depois é trocada pela oficial (tudo ou nada)
+        replace_table_atomic(df_final, 'recently_played', 'silver', engine)
         
         # Faz uma pequena consulta SQL para confirmar ao utilizador quantas linhas estão no banco
         check_df = pd.read_sql("SELECT count(*) FROM silver.recently_played", engine)
@@ -177,11 +172,15 @@ def save_silver_to_s3(df_new: pd.DataFrame):
         print("💎 Dados carregados com sucesso no RDS (DBeaver atualizado)!")
     
     except Exception as e:
-        # Captura qualquer erro de conexão ou de SQL para não travar o pipeline
+        # Propaga o erro para o ledger não marcar a Silver como concluída;
+        # a próxima execução retoma a partir desta etapa
         print(f"❌ Erro ao carregar dados no RDS: {e}")
+        raise
+
+    return silver_key
 
 def run_silver():
     items = read_raw_files_from_s3()
     print(f"🔎 Total de items lidos da Bronze: {len(items)}")
     df = transform_items(items)
-    save_silver_to_s3(df)
+    return save_silver_to_s3(df)
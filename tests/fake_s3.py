@@ -0,0 +1,32 @@
+import hashlib
+import io
+import types
+from botocore.exceptions import ClientError
+
+class FakeS3:
+    """S3 em memória com o suficiente para o ledger: get/put e escrita condicional (IfMatch/IfNoneMatch)."""
+
+    class NoSuchKey(Exception):
+        pass
+
+    def __init__(self):
+        self.store = {}
+        self.exceptions = types.SimpleNamespace(NoSuchKey=self.NoSuchKey)
+
+    @staticmethod
+    def _etag(body: str) -> str:
+        return f'"{hashlib.md5(body.encode()).hexdigest()}"'
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.store:
+            raise self.NoSuchKey(Key)
+        body = self.store[Key]
+        return {"Body": io.BytesIO(body.encode()), "ETag": self._etag(body)}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        current = self.store.get(Key)
+        if IfNoneMatch == "*" and current is not None:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        if IfMatch is not None and (current is None or self._etag(current) != IfMatch):
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        self.store[Key] = Body
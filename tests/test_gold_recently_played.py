@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from src.transform.gold import gold_recently_played as gold
+
+def _silver_df() -> pd.DataFrame:
+    return pd.DataFrame([{
+        "played_at": "2026-10-19T10:00:00Z",
+        "track_id": "t1",
+        "track_name": "Track",
+        "duration_ms": 1000,
+        "popularity": 50,
+        "explicit": False,
+        "album_id": "al1",
+        "album_name": "Album",
+        "album_release_date": "2020-01-01",
+        "artist_id": "ar1",
+        "artist_name": "Artist",
+    }])
+
+def test_run_gold_skips_finished_tables(monkeypatch):
+    saved = []
+    monkeypatch.setattr(gold, "load_silver_from_s3", _silver_df)
+    monkeypatch.setattr(
+        gold, "save_gold_incremental",
+        lambda df, table_name, pk_columns: saved.append(table_name) or f"gold/{table_name}.csv"
+    )
+    started, done = [], []
+
+    keys = gold.run_gold(
+        skip_tables=["dim_artist", "dim_album"],
+        on_table_start=started.append,
+        on_table_done=lambda table_name, s3_key: done.append(table_name),
+    )
+
+    assert saved == ["dim_track", "fact_recently_played"]
+    assert started == done == saved
+    assert keys == {
+        "dim_track": "gold/dim_track.csv",
+        "fact_recently_played": "gold/fact_recently_played.csv",
+    }
+
+def test_run_gold_reports_failing_table(monkeypatch):
+    def save(df, table_name, pk_columns):
+        if table_name == "dim_track":
+            raise RuntimeError("boom")
+        return f"gold/{table_name}.csv"
+
+    monkeypatch.setattr(gold, "load_silver_from_s3", _silver_df)
+    monkeypatch.setattr(gold, "save_gold_incremental", save)
+    started, done = [], []
+
+    with pytest.raises(RuntimeError):
+        gold.run_gold(on_table_start=started.append, on_table_done=lambda t, k: done.append(t))
+
+    assert started[-1] == "dim_track"
+    assert done == ["dim_artist", "dim_album"]
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from src import pipeline
+from src.ledger import run_ledger
+from tests.fake_s3 import FakeS3
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(run_ledger, "s3_client", fake)
+    return fake
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Substitui as etapas caras (API, S3, RDS) e registra o que foi chamado."""
+    calls = []
+    monkeypatch.setattr(pipeline, "create_tables", lambda: None)
+    monkeypatch.setattr(pipeline, "load_access_token", lambda: "token")
+    monkeypatch.setattr(pipeline, "get_recently_played", lambda token, limit: calls.append("api") or {})
+    monkeypatch.setattr(pipeline, "save_recently_played_raw_to_s3", lambda data: "raw/x.json")
+    monkeypatch.setattr(pipeline, "run_silver", lambda: calls.append("silver") or "silver/recently_played.csv")
+    return calls
+
+def _latest_ledger(s3) -> dict:
+    run_id = json.loads(s3.store[run_ledger.LATEST_KEY])["run_id"]
+    return json.loads(s3.store[run_ledger._ledger_key(run_id)])
+
+def _gold(fail_on=None, error=RuntimeError("boom")):
+    def run_gold(skip_tables, on_table_start, on_table_done):
+        for table_name in ["dim_artist", "dim_album", "dim_track", "fact_recently_played"]:
+            if table_name in skip_tables:
+                continue
+            on_table_start(table_name)
+            if table_name == fail_on:
+                raise error
+            on_table_done(table_name, f"gold/{table_name}.csv")
+    return run_gold
+
+def test_gold_table_failure_is_recorded_and_resumed(s3, stages, monkeypatch):
+    monkeypatch.setattr(pipeline, "run_gold", _gold(fail_on="dim_track"))
+    with pytest.raises(RuntimeError):
+        pipeline.run_pipeline()
+
+    ledger = _latest_ledger(s3)
+    assert ledger["status"] == "failed"
+    assert ledger["stages"]["gold.dim_track"]["status"] == "failed"
+    assert ledger["stages"]["gold"]["failed_substage"] == "gold.dim_track"
+
+    skipped = []
+    def run_gold(skip_tables, on_table_start, on_table_done):
+        skipped.extend(skip_tables)
+        _gold()(skip_tables, on_table_start, on_table_done)
+    monkeypatch.setattr(pipeline, "run_gold", run_gold)
+    pipeline.run_pipeline()
+
+    assert stages == ["api", "silver"]
+    assert skipped == ["dim_artist", "dim_album"]
+    assert _latest_ledger(s3)["status"] == "completed"
+
+def test_interrupted_run_is_marked_failed_and_resumable(s3, stages, monkeypatch):
+    monkeypatch.setattr(pipeline, "run_gold", _gold(fail_on="dim_album", error=KeyboardInterrupt()))
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.run_pipeline()
+
+    assert _latest_ledger(s3)["status"] == "failed"
+
+    # Sem esperar o limite de 'running' travado: a retomada é imediata
+    monkeypatch.setattr(pipeline, "run_gold", _gold())
+    pipeline.run_pipeline()
+
+    assert stages == ["api", "silver"]
+    assert _latest_ledger(s3)["status"] == "completed"
@@ -0,0 +1,161 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.ledger import run_ledger
+from src.ledger.run_ledger import RunConflictError
+from tests.fake_s3 import FakeS3
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(run_ledger, "s3_client", fake)
+    return fake
+
+def _ago(**delta) -> str:
+    return (datetime.now() - timedelta(**delta)).isoformat(timespec="seconds")
+
+def _read_ledger(s3, run_id: str) -> dict:
+    return json.loads(s3.store[run_ledger._ledger_key(run_id)])
+
+def _latest_run_id(s3) -> str:
+    return json.loads(s3.store[run_ledger.LATEST_KEY])["run_id"]
+
+def _age_ledger(s3, run_id: str, **fields):
+    """Reescreve campos do ledger direto no S3 (simula execuções antigas/travadas)."""
+    ledger = _read_ledger(s3, run_id)
+    ledger.update(fields)
+    s3.store[run_ledger._ledger_key(run_id)] = json.dumps(ledger)
+
+def _failed_run(s3, stage="silver") -> dict:
+    ledger = run_ledger.start_or_resume_run()
+    run_ledger.mark_stage_done(ledger, "raw", {"s3_key": "raw/x.json"})
+    run_ledger.mark_run_failed(ledger, stage, RuntimeError("boom"))
+    return ledger
+
+def test_first_run_starts_fresh(s3):
+    ledger = run_ledger.start_or_resume_run()
+
+    assert ledger["status"] == "running"
+    assert ledger["stages"] == {}
+    assert _latest_run_id(s3) == ledger["run_id"]
+
+def test_run_ids_are_unique_within_the_same_second(s3):
+    assert run_ledger._new_run_id() != run_ledger._new_run_id()
+
+def test_resume_after_failure_keeps_finished_stages(s3):
+    failed = _failed_run(s3)
+
+    resumed = run_ledger.start_or_resume_run()
+
+    assert resumed["run_id"] == failed["run_id"]
+    assert resumed["resume_count"] == 1
+    assert run_ledger.is_stage_done(resumed, "raw")
+    assert not run_ledger.is_stage_done(resumed, "silver")
+    assert run_ledger.get_stage_outputs(resumed, "raw") == {"s3_key": "raw/x.json"}
+
+def test_completed_run_is_not_resumed(s3):
+    ledger = run_ledger.start_or_resume_run()
+    run_ledger.mark_run_completed(ledger)
+
+    new = run_ledger.start_or_resume_run()
+
+    assert new["run_id"] != ledger["run_id"]
+
+def test_old_run_is_abandoned_by_age(s3):
+    failed = _failed_run(s3)
+    _age_ledger(s3, failed["run_id"], started_at=_ago(hours=run_ledger.MAX_RESUME_AGE_HOURS + 1))
+
+    new = run_ledger.start_or_resume_run()
+
+    assert new["run_id"] != failed["run_id"]
+    assert new["stages"] == {}
+    assert _read_ledger(s3, failed["run_id"])["status"] == "abandoned"
+    assert _latest_run_id(s3) == new["run_id"]
+
+def test_run_is_abandoned_after_max_resume_attempts(s3):
+    failed = _failed_run(s3)
+    for _ in range(run_ledger.MAX_RESUME_ATTEMPTS):
+        resumed = run_ledger.start_or_resume_run()
+        assert resumed["run_id"] == failed["run_id"]
+        run_ledger.mark_run_failed(resumed, "silver", RuntimeError("boom"))
+
+    new = run_ledger.start_or_resume_run()
+
+    assert new["run_id"] != failed["run_id"]
+    assert _read_ledger(s3, failed["run_id"])["status"] == "abandoned"
+
+def test_refuses_to_start_while_a_fresh_run_is_running(s3):
+    running = run_ledger.start_or_resume_run()
+
+    with pytest.raises(RunConflictError):
+        run_ledger.start_or_resume_run()
+
+    assert _latest_run_id(s3) == running["run_id"]
+    assert _read_ledger(s3, running["run_id"])["status"] == "running"
+
+def test_force_new_refuses_while_a_fresh_run_is_running(s3):
+    running = run_ledger.start_or_resume_run()
+
+    with pytest.raises(RunConflictError):
+        run_ledger.start_or_resume_run(resume=False)
+
+    # A execução em andamento continua dona do ledger e consegue seguir gravando
+    assert _latest_run_id(s3) == running["run_id"]
+    run_ledger.mark_stage_done(running, "raw", {"s3_key": "raw/x.json"})
+    assert _read_ledger(s3, running["run_id"])["status"] == "running"
+
+def test_stale_running_ledger_is_resumed(s3):
+    stuck = run_ledger.start_or_resume_run()
+    _age_ledger(s3, stuck["run_id"], updated_at=_ago(minutes=run_ledger.STALE_RUNNING_MINUTES + 1))
+
+    resumed = run_ledger.start_or_resume_run()
+
+    assert resumed["run_id"] == stuck["run_id"]
+
+def test_force_new_abandons_failed_run(s3):
+    failed = _failed_run(s3)
+
+    new = run_ledger.start_or_resume_run(resume=False)
+
+    assert new["run_id"] != failed["run_id"]
+    assert _read_ledger(s3, failed["run_id"])["status"] == "abandoned"
+
+def test_superseded_run_cannot_write_its_ledger(s3):
+    stuck = run_ledger.start_or_resume_run()
+    _age_ledger(s3, stuck["run_id"], updated_at=_ago(minutes=run_ledger.STALE_RUNNING_MINUTES + 1))
+    new = run_ledger.start_or_resume_run(resume=False)
+
+    # O processo antigo "acorda" e tenta gravar: não pode sobrescrever nem mover o ponteiro
+    with pytest.raises(RunConflictError):
+        run_ledger.mark_stage_done(stuck, "raw", {"s3_key": "raw/x.json"})
+
+    assert _read_ledger(s3, stuck["run_id"])["status"] == "abandoned"
+    assert _latest_run_id(s3) == new["run_id"]
+
+def test_concurrent_claim_is_rejected(s3):
+    latest, etag = run_ledger._get_latest()
+    run_ledger._claim_latest("run_a", etag)
+
+    # Segunda execução leu o ponteiro antes da primeira escrever
+    with pytest.raises(RunConflictError):
+        run_ledger._claim_latest("run_b", etag)
+
+    assert _latest_run_id(s3) == "run_a"
+
+def test_substage_failure_is_recorded_on_parent_too(s3):
+    ledger = run_ledger.start_or_resume_run()
+
+    run_ledger.mark_run_failed(ledger, "gold.dim_track", RuntimeError("boom"))
+
+    stored = _read_ledger(s3, ledger["run_id"])
+    assert stored["stages"]["gold.dim_track"]["status"] == "failed"
+    assert stored["stages"]["gold"]["failed_substage"] == "gold.dim_track"
+
+def test_interrupt_without_message_is_recorded(s3):
+    ledger = run_ledger.start_or_resume_run()
+
+    run_ledger.mark_run_failed(ledger, "raw", KeyboardInterrupt())
+
+    assert _read_ledger(s3, ledger["run_id"])["stages"]["raw"]["error"] == "KeyboardInterrupt"